@@ -9,22 +9,27 @@ import os
 import sys
 import re
 import logging
+import hashlib
+import shutil
+import importlib.util
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from urllib.parse import urljoin, urlparse
 import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-import requests
-from playwright.async_api import async_playwright, Page, Browser
-from PyPDF2 import PdfReader, PdfWriter
+import aiohttp
+import aiofiles
+import orjson
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, TimeoutError as PlaywrightTimeoutError
+import pikepdf
+from pikepdf import OutlineItem
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
-import fitz  # PyMuPDF for better PDF handling and OCR
+from reportlab.pdfbase.pdfmetrics import stringWidth
+import fitz  # PyMuPDF for better PDF handling
 
 # Configuración
 BASE_URL = "https://ais.anac.gob.ar"
@@ -33,6 +38,61 @@ DOWNLOAD_FOLDER = Path("./aip_downloads")
 OUTPUT_FOLDER = Path("./aip_output")
 FINAL_PDF = "AIP_Argentina_Completo.pdf"
 TEMP_FOLDER = Path("./temp_aip")
+DOWNLOAD_CACHE_FILE = DOWNLOAD_FOLDER / ".cache.json"
+PDF_INFO_CACHE_FILE = DOWNLOAD_FOLDER / ".pdf_info.json"
+MANIFEST_FILE = OUTPUT_FOLDER / ".manifest.json"
+COMBINER_VERSION = "2"  # Incrementar al cambiar la lógica de combinación para invalidar el manifiesto
+DEFAULT_PAGE_ESTIMATE = 5  # Páginas asumidas para documentos que no se pueden leer
+
+# Descargas concurrentes
+MAX_CONCURRENT_DOWNLOADS = 8
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HEAD_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# Opciones de guardado de PDFs: streams comprimidos y recomprimidos,
+# object streams y salida linealizada (optimizada para web)
+PDF_SAVE_OPTIONS = dict(
+    linearize=True,
+    compress_streams=True,
+    recompress_flate=True,
+    stream_decode_level=pikepdf.StreamDecodeLevel.generalized,
+    object_stream_mode=pikepdf.ObjectStreamMode.generate,
+)
+
+# Script ejecutado en el navegador para leer la tabla de documentos:
+# título (primera columna) y enlace/versión (última columna) de cada fila
+EXTRACT_ROWS_JS = """
+() => Array.from(document.querySelectorAll('tbody tr')).map(tr => {
+    const titleCell = tr.querySelector('td:first-child');
+    const link = tr.querySelector('td:last-child a');
+    return {
+        title: titleCell ? titleCell.innerText : null,
+        version: link ? link.innerText : null,
+        href: link ? link.getAttribute('href') : null
+    };
+})
+"""
+
+# Detecta que la primera celda de la tabla cambió, usado al paginar
+FIRST_CELL_CHANGED_JS = "prev => { const td = document.querySelector('tbody tr td'); return td !== null && td.innerText !== prev; }"
+TABLE_TIMEOUT_MS = 10000
+
+# Recursos que el scraper no necesita y se bloquean durante la navegación
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media', 'stylesheet'}
+BLOCKED_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'facebook.net',
+    'hotjar.com',
+)
+
+# Expresiones regulares para nombres de archivo y subsecciones
+_NONWORD_RE = re.compile(r'[^\w\s-]')
+_WS_RE = re.compile(r'\s+')
+_SUBSECTION_RE = re.compile(r'^([A-Z]+-[\d.]+)')
 
 # Configurar logging
 logging.basicConfig(
@@ -45,6 +105,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def block_unneeded_resources(route):
+    """Aborta imágenes, fuentes, estilos y analíticas; deja pasar el resto"""
+    request = route.request
+    hostname = urlparse(request.url).hostname or ""
+    
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or hostname.endswith(BLOCKED_DOMAINS):
+        await route.abort()
+    else:
+        await route.continue_()
+
 class AIpDocument:
     """Representa un documento PDF del AIP"""
     def __init__(self, title: str, url: str, section: str, subsection: str = "", version: str = "", date: str = ""):
@@ -59,8 +129,7 @@ class AIpDocument:
         
     def _generate_filename(self) -> str:
         """Genera un nombre de archivo limpio"""
-        clean_title = re.sub(r'[^\w\s-]', '', self.title)
-        clean_title = re.sub(r'\s+', '_', clean_title)
+        clean_title = _WS_RE.sub('_', _NONWORD_RE.sub('', self.title))
         return f"{self.section}_{clean_title}.pdf"
     
     def __str__(self):
@@ -70,19 +139,20 @@ class AIPScraper:
     """Scraper principal para el sitio AIP de Argentina"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        }
         self.documents: List[AIpDocument] = []
         
     async def scrape_section_documents(self, page: Page, section: str) -> List[AIpDocument]:
         """Extrae todos los documentos de una sección específica"""
         logger.info(f"Extrayendo documentos de la sección {section}")
         
-        # Hacer clic en la sección correspondiente
+        # Hacer clic en la sección correspondiente y esperar a que haya filas en la tabla;
+        # si la sección ya estaba visible su contenido no cambia, así que no se exige cambio
         await page.click(f'a[href="/aip#{section.lower()}"]')
-        await page.wait_for_timeout(2000)
+        if not await self._wait_for_table_update(page, None):
+            logger.warning(f"La tabla de la sección {section} no se actualizó a tiempo")
         
         documents = []
         seen_documents = set()  # Para evitar duplicados
@@ -91,52 +161,41 @@ class AIPScraper:
         while True:
             logger.info(f"Procesando página {page_num} de sección {section}")
             
-            # Extraer documentos de la página actual
-            rows = await page.query_selector_all('tbody tr')
+            # Extraer todas las filas de la página actual en una sola llamada al navegador
+            rows = await page.evaluate(EXTRACT_ROWS_JS)
             
             for row in rows:
-                try:
-                    title_cell = await row.query_selector('td:first-child')
-                    link_cell = await row.query_selector('td:last-child a')
+                title = row['title']
+                href = row['href']
+                
+                if href and title:
+                    # Crear identificador único para evitar duplicados
+                    doc_id = f"{title.strip()}|{href}"
                     
-                    if title_cell and link_cell:
-                        title = await title_cell.inner_text()
-                        version_date = await link_cell.inner_text()
-                        href = await link_cell.get_attribute('href')
-                        
-                        if href and title:
-                            # Crear identificador único para evitar duplicados
-                            doc_id = f"{title.strip()}|{href}"
-                            
-                            # Filtrar documentos según criterios y evitar duplicados
-                            if doc_id not in seen_documents and self._should_include_document(title, section):
-                                url = urljoin(BASE_URL, href)
-                                doc = AIpDocument(
-                                    title=title.strip(),
-                                    url=url,
-                                    section=section,
-                                    version=version_date.strip() if version_date else "",
-                                    subsection=self._extract_subsection(title)
-                                )
-                                documents.append(doc)
-                                seen_documents.add(doc_id)
-                                logger.info(f"Documento agregado: {doc}")
-                            
-                except Exception as e:
-                    logger.warning(f"Error procesando fila: {e}")
-                    continue
+                    # Filtrar documentos según criterios y evitar duplicados
+                    if doc_id not in seen_documents and self._should_include_document(title, section):
+                        # La versión solo se lee para las filas que se conservan
+                        version_date = row['version']
+                        url = urljoin(BASE_URL, href)
+                        doc = AIpDocument(
+                            title=title.strip(),
+                            url=url,
+                            section=section,
+                            version=version_date.strip() if version_date else "",
+                            subsection=self._extract_subsection(title)
+                        )
+                        documents.append(doc)
+                        seen_documents.add(doc_id)
+                        logger.info(f"Documento agregado: {doc}")
             
             # Verificar si hay página siguiente
             next_button = await page.query_selector('text=Siguiente')
             if next_button and await next_button.is_enabled():
-                # Verificar si realmente hay contenido diferente
-                current_url = page.url
                 await next_button.click()
-                await page.wait_for_timeout(2000)
                 
-                # Si la URL no cambió o regresamos a la misma página, terminar
-                new_url = page.url
-                if current_url == new_url or page_num > 10:  # Límite de seguridad
+                # Si el contenido no cambió, no hay más páginas
+                previous_first_cell = rows[0]['title'] if rows else None
+                if not await self._wait_for_table_update(page, previous_first_cell) or page_num > 10:  # Límite de seguridad
                     break
                     
                 page_num += 1
@@ -151,6 +210,20 @@ class AIPScraper:
         logger.info(f"Encontrados {len(documents)} documentos en sección {section}")
         return documents
     
+    async def _wait_for_table_update(self, page: Page, previous_first_cell: Optional[str]) -> bool:
+        """Espera a que la tabla tenga filas y, si se indica la primera celda anterior, a que cambie.
+        
+        Devuelve False si no ocurre a tiempo.
+        """
+        try:
+            if previous_first_cell is None:
+                await page.wait_for_selector('tbody tr td', state='attached', timeout=TABLE_TIMEOUT_MS)
+            else:
+                await page.wait_for_function(FIRST_CELL_CHANGED_JS, arg=previous_first_cell, timeout=TABLE_TIMEOUT_MS)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+    
     def _should_include_document(self, title: str, section: str) -> bool:
         """Determina si un documento debe ser incluido según los criterios"""
         if section in ['GEN', 'ENR', 'AD']:
@@ -160,7 +233,7 @@ class AIPScraper:
     
     def _extract_subsection(self, title: str) -> str:
         """Extrae la subsección del título del documento"""
-        match = re.match(r'^([A-Z]+-[\d.]+)', title)
+        match = _SUBSECTION_RE.match(title)
         return match.group(1) if match else ""
     
     async def scrape_all_documents(self) -> List[AIpDocument]:
@@ -169,16 +242,16 @@ class AIPScraper:
         
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+            context = await browser.new_context(bypass_csp=True)
+            await context.route("**/*", block_unneeded_resources)
             
             try:
-                await page.goto(AIP_URL)
-                await page.wait_for_load_state('networkidle')
-                
-                # Extraer documentos de cada sección
+                # Extraer documentos de cada sección en paralelo, una pestaña por sección
                 sections = ['GEN', 'ENR', 'AD']
-                for section in sections:
-                    section_docs = await self.scrape_section_documents(page, section)
+                results = await asyncio.gather(
+                    *(self._scrape_section_in_new_page(context, section) for section in sections)
+                )
+                for section_docs in results:
                     self.documents.extend(section_docs)
                     
                 logger.info(f"Total de documentos encontrados: {len(self.documents)}")
@@ -188,25 +261,86 @@ class AIPScraper:
                 
         return self.documents
     
-    def download_document(self, document: AIpDocument) -> bool:
-        """Descarga un documento PDF individual"""
+    async def _scrape_section_in_new_page(self, context: BrowserContext, section: str) -> List[AIpDocument]:
+        """Abre una pestaña propia, navega al AIP y extrae los documentos de la sección"""
+        page = await context.new_page()
+        try:
+            await page.goto(AIP_URL)
+            await page.wait_for_selector(f'a[href="/aip#{section.lower()}"]')
+            return await self.scrape_section_documents(page, section)
+        finally:
+            await page.close()
+    
+    async def download_document(self, session: aiohttp.ClientSession, document: AIpDocument, cache: Dict) -> bool:
+        """Descarga un documento PDF individual, reintentando ante errores transitorios.
+        
+        Si el archivo ya fue descargado, se envía una petición condicional con el
+        ETag/Last-Modified guardado en caché y se omite la descarga si no cambió.
+        """
         try:
             logger.info(f"Descargando: {document.title}")
             
-            response = self.session.get(document.url, timeout=60)
-            response.raise_for_status()
-            
-            # Verificar que es un PDF
-            if 'application/pdf' not in response.headers.get('content-type', ''):
-                logger.warning(f"El archivo no es un PDF: {document.title}")
-                return False
-            
-            # Guardar archivo
             DOWNLOAD_FOLDER.mkdir(exist_ok=True)
             file_path = DOWNLOAD_FOLDER / document.filename
             
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+            headers = {}
+            cached = cache.get(document.filename) if file_path.exists() else None
+            if cached:
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    headers['If-Modified-Since'] = cached['last_modified']
+            
+            for attempt in range(1, DOWNLOAD_RETRIES + 1):
+                try:
+                    # Descartar archivos que no son PDF antes de transferir el contenido
+                    if not cached:
+                        async with session.head(document.url, allow_redirects=True, timeout=HEAD_TIMEOUT) as head:
+                            if head.status < 400 and 'application/pdf' not in head.headers.get('content-type', ''):
+                                logger.warning(f"El archivo no es un PDF: {document.title}")
+                                return False
+                    
+                    async with session.get(document.url, headers=headers) as response:
+                        # El archivo local sigue vigente
+                        if response.status == 304:
+                            document.local_path = file_path
+                            logger.info(f"Sin cambios, se reutiliza: {file_path}")
+                            return True
+                        
+                        response.raise_for_status()
+                        
+                        # Verificar que es un PDF
+                        if 'application/pdf' not in response.headers.get('content-type', ''):
+                            logger.warning(f"El archivo no es un PDF: {document.title}")
+                            return False
+                        
+                        # Invalidar la entrada hasta completar la descarga
+                        cache.pop(document.filename, None)
+                        sha256 = hashlib.sha256()
+                        size = 0
+                        
+                        # Guardar archivo por bloques sin bloquear el event loop
+                        async with aiofiles.open(file_path, 'wb') as f:
+                            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                                sha256.update(chunk)
+                                size += len(chunk)
+                                await f.write(chunk)
+                        
+                        cache[document.filename] = {
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified'),
+                            'sha256': sha256.hexdigest(),
+                            'size': size
+                        }
+                    break
+                    
+                except (aiohttp.ClientResponseError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status in RETRY_STATUSES
+                    if not retryable or attempt == DOWNLOAD_RETRIES:
+                        raise
+                    delay = 2 ** (attempt - 1)
+                    logger.warning(f"Reintentando {document.title} en {delay}s (intento {attempt}/{DOWNLOAD_RETRIES}): {e}")
+                    await asyncio.sleep(delay)
             
             document.local_path = file_path
             logger.info(f"Descargado exitosamente: {file_path}")
@@ -216,115 +350,292 @@ class AIPScraper:
             logger.error(f"Error descargando {document.title}: {e}")
             return False
     
-    def download_all_documents(self) -> int:
-        """Descarga todos los documentos encontrados"""
+    async def download_all_documents(self) -> int:
+        """Descarga todos los documentos encontrados en paralelo"""
         logger.info("Iniciando descarga de documentos")
         
-        successful_downloads = 0
+        cache = load_json_cache(DOWNLOAD_CACHE_FILE)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+        
+        # Documentos distintos pueden compartir nombre de archivo: descargar cada archivo
+        # una sola vez para que dos escrituras concurrentes no se mezclen en el mismo destino
+        unique_documents: Dict[str, AIpDocument] = {}
         for doc in self.documents:
-            if self.download_document(doc):
-                successful_downloads += 1
+            if doc.filename in unique_documents:
+                logger.warning(f"Se omite {doc.title} ({doc.url}): el archivo {doc.filename} "
+                               f"ya corresponde a {unique_documents[doc.filename].url}")
+            else:
+                unique_documents[doc.filename] = doc
+        
+        # Conexiones persistentes reutilizadas entre descargas y DNS en caché
+        connector = aiohttp.TCPConnector(
+            limit=32,
+            limit_per_host=MAX_CONCURRENT_DOWNLOADS,
+            use_dns_cache=True,
+            ttl_dns_cache=600,
+            keepalive_timeout=60
+        )
+        # Sin límite total: un PDF grande puede tardar mientras siga llegando contenido
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+        
+        try:
+            async with aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=timeout) as session:
+                async def download_limited(doc: AIpDocument) -> bool:
+                    async with semaphore:
+                        return await self.download_document(session, doc, cache)
                 
+                results = await asyncio.gather(*(download_limited(doc) for doc in unique_documents.values()))
+        finally:
+            save_json_cache(DOWNLOAD_CACHE_FILE, cache)
+        
+        successful_downloads = sum(results)
         logger.info(f"Descargados exitosamente: {successful_downloads}/{len(self.documents)}")
         return successful_downloads
 
+def probe_pdf(pdf_path: str) -> Tuple[int, bool]:
+    """Devuelve el número de páginas del PDF y si necesita OCR (sin capa de texto pero con imágenes)"""
+    with fitz.open(pdf_path) as doc:
+        # Basta una página con texto para descartar OCR
+        for page in doc:
+            if len(page.get_text("text").strip()) >= 100:
+                return doc.page_count, False
+        
+        return doc.page_count, any(page.get_images() for page in doc)
+
+def ocr_available() -> bool:
+    """Indica si OCRmyPDF y Tesseract están instalados"""
+    return importlib.util.find_spec('ocrmypdf') is not None and shutil.which('tesseract') is not None
+
+def apply_ocr(pdf_path: str, jobs: Optional[int] = None) -> str:
+    """Aplica OCR al PDF y devuelve la ruta del PDF resultante"""
+    try:
+        import ocrmypdf
+    except ImportError:
+        logger.warning("ocrmypdf no disponible, OCR omitido")
+        return pdf_path
+    
+    try:
+        logger.info(f"Aplicando OCR a: {pdf_path}")
+        ocr_path = str(Path(pdf_path).with_suffix('.ocr.pdf'))
+        
+        # OCRmyPDF solo agrega una capa de texto invisible a las páginas que
+        # no la tienen y conserva el contenido vectorial original.
+        # optimize=1 no requiere herramientas externas (2 y 3 exigen pngquant)
+        ocrmypdf.ocr(
+            pdf_path,
+            ocr_path,
+            skip_text=True,
+            language='spa',
+            optimize=1,
+            jobs=jobs or os.cpu_count(),
+            fast_web_view=1.0,
+            output_type='pdf',
+            progress_bar=False
+        )
+        
+        return ocr_path
+        
+    except Exception as e:
+        logger.error(f"Error aplicando OCR a {pdf_path}: {e}")
+        return pdf_path
+
+def file_sha256(file_path: Path) -> str:
+    """Calcula el SHA-256 de un archivo leyéndolo por bloques"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def load_json_cache(cache_path: Path) -> Dict:
+    """Carga un archivo de caché JSON, devolviendo un diccionario vacío si no existe o es inválido"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_json_cache(cache_path: Path, cache: Dict):
+    """Guarda un archivo de caché JSON"""
+    cache_path.parent.mkdir(exist_ok=True)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+
+def truncate_to_width(text: str, max_width: float, font_name: str, font_size: float) -> str:
+    """Recorta el texto con "..." para que su ancho dibujado no supere max_width"""
+    if stringWidth(text, font_name, font_size) <= max_width:
+        return text
+    
+    # Búsqueda binaria del prefijo más largo que entra junto con los puntos suspensivos
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if stringWidth(text[:mid].rstrip() + "...", font_name, font_size) <= max_width:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low].rstrip() + "..."
+
 class PDFCombiner:
     """Combina múltiples PDFs en uno solo con marcadores e índice"""
     
     def __init__(self, documents: List[AIpDocument]):
         self.documents = documents
         self.toc_entries = []  # Tabla de contenidos
+        self._ocr_paths: Optional[Dict[Path, Path]] = None  # PDF original -> PDF con OCR
+        self._page_counts: Dict[Path, int] = {}
+        self._needs_ocr: Dict[Path, bool] = {}
+        self._probe_documents()
         
     def create_index_pdf(self) -> str:
         """Crea un PDF con el índice de contenidos"""
         TEMP_FOLDER.mkdir(exist_ok=True)
         index_path = TEMP_FOLDER / "indice.pdf"
         
-        # Configurar documento
-        doc = SimpleDocTemplate(
-            str(index_path),
-            pagesize=A4,
-            rightMargin=inch/2,
-            leftMargin=inch/2,
-            topMargin=inch,
-            bottomMargin=inch
-        )
-        
-        # Estilos
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'TitleStyle',
-            parent=styles['Title'],
-            fontSize=18,
-            alignment=TA_CENTER,
-            spaceAfter=30
-        )
-        
-        section_style = ParagraphStyle(
-            'SectionStyle',
-            parent=styles['Heading1'],
-            fontSize=14,
-            leftIndent=0,
-            spaceAfter=12
-        )
-        
-        subsection_style = ParagraphStyle(
-            'SubsectionStyle',
-            parent=styles['Heading2'],
-            fontSize=12,
-            leftIndent=20,
-            spaceAfter=8
-        )
-        
-        # Contenido del índice
-        story = []
-        story.append(Paragraph("ÍNDICE DE CONTENIDOS", title_style))
-        story.append(Paragraph("Publicación de Información Aeronáutica (AIP) - República Argentina", styles['Normal']))
-        story.append(Paragraph(f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
-        story.append(Spacer(1, 20))
+        # Configurar página y márgenes
+        page_width, page_height = A4
+        left_margin = inch / 2
+        right_margin = page_width - inch / 2
+        top_margin = page_height - inch
+        bottom_margin = inch
+        entry_indent = 20
+        
+        c = canvas.Canvas(str(index_path), pagesize=A4)
+        y = top_margin
+        
+        def next_line(line_height: float, font_name: str, font_size: float) -> float:
+            """Avanza una línea, pasando a una nueva página si no hay espacio"""
+            nonlocal y
+            if y - line_height < bottom_margin:
+                c.showPage()
+                y = top_margin
+            y -= line_height
+            c.setFont(font_name, font_size)
+            return y
+        
+        # Encabezado
+        c.setFont("Helvetica-Bold", 18)
+        c.drawCentredString(page_width / 2, y, "ÍNDICE DE CONTENIDOS")
+        y -= 30
+        next_line(14, "Helvetica", 10)
+        c.drawString(left_margin, y, "Publicación de Información Aeronáutica (AIP) - República Argentina")
+        next_line(14, "Helvetica", 10)
+        c.drawString(left_margin, y, f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+        y -= 20
+        
+        # Ancho del punto de la línea guía, calculado una sola vez
+        dot_width = stringWidth(".", "Helvetica", 11)
         
         # Agrupar documentos por sección
         sections = self._group_documents_by_section()
         page_num = 3  # Empezar después del índice
         
         for section_name, docs in sections.items():
-            story.append(Paragraph(f"{section_name}", section_style))
+            next_line(24, "Helvetica-Bold", 14)
+            c.drawString(left_margin, y, section_name)
+            y -= 4
             
             for doc in docs:
-                title = doc.title.replace(f"{section_name}-", "").strip()
-                if len(title) > 80:
-                    title = title[:80] + "..."
+                # Título, línea de puntos y número de página alineado a la derecha
+                next_line(16, "Helvetica", 11)
+                number = str(page_num)
+                number_start = right_margin - stringWidth(number, "Helvetica", 11)
                 
-                entry = Paragraph(
-                    f"{title} ..................................... {page_num}",
-                    subsection_style
+                # Recortar el título según su ancho real para que no pise el número de página
+                title = truncate_to_width(
+                    doc.title.replace(f"{section_name}-", "").strip(),
+                    number_start - (left_margin + entry_indent) - 2 * dot_width,
+                    "Helvetica", 11
                 )
-                story.append(entry)
+                title_end = left_margin + entry_indent + stringWidth(title, "Helvetica", 11)
+                dots = int((number_start - title_end - 2 * dot_width) / dot_width)
+                
+                c.drawString(left_margin + entry_indent, y, title)
+                if dots > 0:
+                    c.drawRightString(number_start - dot_width, y, "." * dots)
+                c.drawRightString(right_margin, y, number)
                 
-                # Estimar páginas del documento (aproximado)
-                if doc.local_path and doc.local_path.exists():
-                    try:
-                        pdf = PdfReader(str(doc.local_path))
-                        page_num += len(pdf.pages)
-                    except:
-                        page_num += 5  # Estimación por defecto
-                else:
-                    page_num += 5
-                    
                 # Almacenar entrada para TOC
                 self.toc_entries.append({
                     'title': title,
                     'section': section_name,
-                    'page': page_num - (len(pdf.pages) if 'pdf' in locals() and pdf else 5)
+                    'page': page_num
                 })
                 
-            story.append(Spacer(1, 12))
+                # Avanzar según las páginas del documento (estimación si no se pudo leer)
+                page_num += self._page_counts.get(doc.local_path, DEFAULT_PAGE_ESTIMATE)
+                
+            y -= 12
         
         # Generar PDF
-        doc.build(story)
+        c.save()
         logger.info(f"Índice creado: {index_path}")
         return str(index_path)
     
+    def _probe_documents(self):
+        """Analiza cada PDF descargado una sola vez (páginas y necesidad de OCR), reutilizando la caché"""
+        cache = load_json_cache(PDF_INFO_CACHE_FILE)
+        cache_changed = False
+        
+        for doc in self.documents:
+            path = doc.local_path
+            if not path or not path.exists():
+                continue
+            
+            # La entrada en caché es válida mientras el archivo no cambie
+            stat = path.stat()
+            entry = cache.get(path.name)
+            if not (entry and entry.get('mtime') == stat.st_mtime and entry.get('size') == stat.st_size):
+                try:
+                    page_count, ocr_needed = probe_pdf(str(path))
+                except Exception as e:
+                    logger.warning(f"No se pudo analizar {path}: {e}")
+                    continue
+                
+                entry = {
+                    'mtime': stat.st_mtime,
+                    'size': stat.st_size,
+                    'page_count': page_count,
+                    'needs_ocr': ocr_needed
+                }
+                cache[path.name] = entry
+                cache_changed = True
+            
+            self._page_counts[path] = entry['page_count']
+            self._needs_ocr[path] = entry['needs_ocr']
+        
+        if cache_changed:
+            save_json_cache(PDF_INFO_CACHE_FILE, cache)
+    
+    def _build_manifest(self) -> Dict:
+        """Describe las entradas del PDF combinado: versión del combinador, disponibilidad de OCR y hash de cada documento"""
+        sections = self._group_documents_by_section()
+        # Reutilizar el hash calculado durante la descarga si el archivo no cambió de tamaño
+        download_cache = load_json_cache(DOWNLOAD_CACHE_FILE)
+        inputs = {}
+        
+        for docs in sections.values():
+            for doc in docs:
+                entry = download_cache.get(doc.filename) or {}
+                if entry.get('sha256') and entry.get('size') == doc.local_path.stat().st_size:
+                    inputs[doc.filename] = entry['sha256']
+                else:
+                    inputs[doc.filename] = file_sha256(doc.local_path)
+        
+        return {
+            'version': COMBINER_VERSION,
+            'ocr': ocr_available(),
+            'inputs': inputs
+        }
+    
+    def _ocr_failed(self) -> bool:
+        """Indica si algún documento que necesitaba OCR quedó sin procesar"""
+        return any(
+            self._ocr_paths.get(path, path) == path
+            for path, ocr_needed in self._needs_ocr.items()
+            if ocr_needed
+        )
+    
     def _group_documents_by_section(self) -> Dict[str, List[AIpDocument]]:
         """Agrupa documentos por sección manteniendo orden jerárquico"""
         sections = {'GEN': [], 'ENR': [], 'AD': []}
@@ -339,73 +650,48 @@ class PDFCombiner:
             
         return sections
     
-    def apply_ocr_if_needed(self, pdf_path: str) -> str:
-        """Aplica OCR al PDF si contiene imágenes sin texto"""
-        try:
-            doc = fitz.open(pdf_path)
-            needs_ocr = False
-            
-            # Verificar si hay páginas con poco texto pero con imágenes
-            for page_num, page in enumerate(doc):
-                text = page.get_text()
-                images = page.get_images()
-                
-                if len(images) > 0 and len(text.strip()) < 100:
-                    needs_ocr = True
-                    break
-            
-            if needs_ocr:
-                logger.info(f"Aplicando OCR a: {pdf_path}")
-                ocr_path = str(Path(pdf_path).with_suffix('.ocr.pdf'))
-                
-                # Aplicar OCR usando PyMuPDF
-                doc_ocr = fitz.open()
-                for page_num in range(doc.page_count):
-                    page = doc[page_num]
-                    
-                    # Renderizar página como imagen
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better OCR
-                    img_data = pix.tobytes("png")
-                    
-                    # Crear nueva página con imagen y texto OCR
-                    new_page = doc_ocr.new_page(width=page.rect.width, height=page.rect.height)
-                    new_page.insert_image(page.rect, stream=img_data)
-                    
-                    # Intentar extraer texto con OCR (requiere tesseract)
-                    try:
-                        import pytesseract
-                        from PIL import Image
-                        import io
-                        
-                        img = Image.open(io.BytesIO(img_data))
-                        ocr_text = pytesseract.image_to_string(img, lang='spa')
-                        
-                        if ocr_text.strip():
-                            # Agregar texto invisible para búsqueda
-                            text_dict = {
-                                "fontsize": 12,
-                                "fontname": "helv",
-                                "color": (1, 1, 1)  # Texto blanco (invisible)
-                            }
-                            new_page.insert_text((50, 50), ocr_text, **text_dict)
-                            
-                    except ImportError:
-                        logger.warning("pytesseract no disponible, OCR omitido")
-                    except Exception as e:
-                        logger.warning(f"Error en OCR para página {page_num}: {e}")
-                
-                doc_ocr.save(ocr_path)
-                doc_ocr.close()
-                doc.close()
-                
-                return ocr_path
-            
-            doc.close()
-            return pdf_path
+    def prepare_ocr_parallel(self) -> Dict[Path, Path]:
+        """Aplica OCR a todos los documentos en paralelo, un proceso por PDF"""
+        pdf_paths = [doc.local_path for doc in self.documents if doc.local_path and doc.local_path.exists()]
+        self._ocr_paths = {}
+        
+        if not pdf_paths:
+            return self._ocr_paths
+        
+        # Los documentos con capa de texto se usan tal cual
+        pending = []
+        for path in pdf_paths:
+            if self._needs_ocr.get(path):
+                pending.append(path)
+            else:
+                self._ocr_paths[path] = path
+        
+        if not pending:
+            return self._ocr_paths
+        
+        logger.info(f"Aplicando OCR a {len(pending)} documentos en paralelo")
+        
+        # Cada proceso ejecuta OCRmyPDF con un solo job: el paralelismo es entre documentos
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = {executor.submit(apply_ocr, str(path), 1): path for path in pending}
             
-        except Exception as e:
-            logger.error(f"Error aplicando OCR a {pdf_path}: {e}")
-            return pdf_path
+            for completed, future in enumerate(as_completed(futures), 1):
+                source_path = futures[future]
+                try:
+                    self._ocr_paths[source_path] = Path(future.result())
+                except Exception as e:
+                    logger.error(f"Error aplicando OCR a {source_path}: {e}")
+                    self._ocr_paths[source_path] = source_path
+                logger.info(f"OCR completado ({completed}/{len(futures)}): {source_path.name}")
+        
+        return self._ocr_paths
+    
+    def cleanup_ocr_files(self):
+        """Elimina los PDFs temporales generados por OCR"""
+        for source_path, pdf_path in (self._ocr_paths or {}).items():
+            if pdf_path != source_path and pdf_path.exists():
+                os.unlink(pdf_path)
+        self._ocr_paths = None
     
     def combine_pdfs(self) -> str:
         """Combina todos los PDFs en uno solo con marcadores"""
@@ -414,66 +700,90 @@ class PDFCombiner:
         OUTPUT_FOLDER.mkdir(exist_ok=True)
         output_path = OUTPUT_FOLDER / FINAL_PDF
         
+        # Reutilizar el PDF existente si ningún documento cambió desde la última ejecución
+        manifest = self._build_manifest()
+        if output_path.exists() and load_json_cache(MANIFEST_FILE) == manifest:
+            logger.info(f"Sin cambios en los documentos, se reutiliza: {output_path}")
+            return str(output_path)
+        
         # Crear índice
         index_path = self.create_index_pdf()
         
-        # Inicializar writer
-        writer = PdfWriter()
+        # Aplicar OCR antes de combinar, en paralelo
+        if self._ocr_paths is None:
+            self.prepare_ocr_parallel()
         
-        # Agregar índice
-        with open(index_path, 'rb') as f:
-            index_pdf = PdfReader(f)
-            for page in index_pdf.pages:
-                writer.add_page(page)
-            
-            # Agregar marcador para índice
-            writer.add_outline_item("Índice de Contenidos", 0)
-        
-        current_page = len(index_pdf.pages)
-        sections = self._group_documents_by_section()
+        # Los PDFs de origen deben permanecer abiertos hasta guardar,
+        # ya que qpdf copia el contenido de los streams al escribir
+        sources = []
+        # Un PDF incompleto no debe quedar registrado en el manifiesto
+        complete = not (manifest['ocr'] and self._ocr_failed())
         
-        # Combinar documentos por sección
-        for section_name, docs in sections.items():
-            section_bookmark = writer.add_outline_item(section_name, current_page)
-            
-            for doc in docs:
-                if not doc.local_path or not doc.local_path.exists():
-                    logger.warning(f"Archivo no encontrado: {doc.title}")
-                    continue
-                
-                try:
-                    # Aplicar OCR si es necesario
-                    pdf_path = self.apply_ocr_if_needed(str(doc.local_path))
+        try:
+            with pikepdf.Pdf.new() as writer:
+                with writer.open_outline() as outline:
+                    # Agregar índice
+                    index_pdf = pikepdf.open(index_path)
+                    sources.append(index_pdf)
+                    writer.pages.extend(index_pdf.pages)
                     
-                    # Agregar PDF
-                    with open(pdf_path, 'rb') as f:
-                        pdf = PdfReader(f)
-                        
-                        # Agregar marcador para documento
-                        title = doc.title.replace(f"{section_name}-", "").strip()
-                        writer.add_outline_item(title, current_page, parent=section_bookmark)
+                    # Agregar marcador para índice
+                    outline.root.append(OutlineItem("Índice de Contenidos", 0))
+                    
+                    sections = self._group_documents_by_section()
+                    
+                    # Combinar documentos por sección
+                    for section_name, docs in sections.items():
+                        section_bookmark = None
                         
-                        # Agregar páginas
-                        for page in pdf.pages:
-                            writer.add_page(page)
+                        for doc in docs:
+                            if not doc.local_path or not doc.local_path.exists():
+                                logger.warning(f"Archivo no encontrado: {doc.title}")
+                                complete = False
+                                continue
                             
-                        current_page += len(pdf.pages)
-                        logger.info(f"Agregado: {doc.title} ({len(pdf.pages)} páginas)")
-                        
-                    # Limpiar archivo OCR temporal si fue creado
-                    if pdf_path != str(doc.local_path):
-                        os.unlink(pdf_path)
-                        
-                except Exception as e:
-                    logger.error(f"Error agregando {doc.title}: {e}")
-                    continue
-        
-        # Guardar PDF final
-        with open(output_path, 'wb') as f:
-            writer.write(f)
+                            try:
+                                # Usar la versión con OCR si fue necesaria
+                                pdf_path = self._ocr_paths.get(doc.local_path, doc.local_path)
+                                
+                                pdf = pikepdf.open(pdf_path)
+                                sources.append(pdf)
+                                
+                                start_page = len(writer.pages)
+                                writer.pages.extend(pdf.pages)
+                                
+                                # Agregar marcadores de sección y documento
+                                if section_bookmark is None:
+                                    section_bookmark = OutlineItem(section_name, start_page)
+                                    outline.root.append(section_bookmark)
+                                title = doc.title.replace(f"{section_name}-", "").strip()
+                                section_bookmark.children.append(OutlineItem(title, start_page))
+                                
+                                logger.info(f"Agregado: {doc.title} ({len(pdf.pages)} páginas)")
+                                
+                            except Exception as e:
+                                logger.error(f"Error agregando {doc.title}: {e}")
+                                complete = False
+                                continue
+                
+                total_pages = len(writer.pages)
+                
+                # Guardar PDF final
+                writer.save(output_path, **PDF_SAVE_OPTIONS)
+        finally:
+            for pdf in sources:
+                pdf.close()
+        
+        if complete:
+            save_json_cache(MANIFEST_FILE, manifest)
+        else:
+            # Sin manifiesto válido, la próxima ejecución vuelve a combinar
+            if MANIFEST_FILE.exists():
+                MANIFEST_FILE.unlink()
+            logger.warning("PDF combinado incompleto, no se reutilizará en la próxima ejecución")
         
         logger.info(f"PDF combinado creado: {output_path}")
-        logger.info(f"Total de páginas: {current_page}")
+        logger.info(f"Total de páginas: {total_pages}")
         
         # Verificar tamaño del archivo
         file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
@@ -492,45 +802,54 @@ class PDFCombiner:
         output_files = []
         sections = self._group_documents_by_section()
         
+        if self._ocr_paths is None:
+            self.prepare_ocr_parallel()
+        
         for section_name, docs in sections.items():
             if not docs:
                 continue
                 
             section_output = OUTPUT_FOLDER / f"AIP_Argentina_{section_name}.pdf"
-            writer = PdfWriter()
+            sources = []
             
-            # Agregar marcador de sección
-            current_page = 0
-            section_bookmark = writer.add_outline_item(section_name, 0)
-            
-            for doc in docs:
-                if not doc.local_path or not doc.local_path.exists():
-                    continue
-                
-                try:
-                    pdf_path = self.apply_ocr_if_needed(str(doc.local_path))
-                    
-                    with open(pdf_path, 'rb') as f:
-                        pdf = PdfReader(f)
-                        
-                        title = doc.title.replace(f"{section_name}-", "").strip()
-                        writer.add_outline_item(title, current_page, parent=section_bookmark)
+            try:
+                with pikepdf.Pdf.new() as writer:
+                    with writer.open_outline() as outline:
+                        section_bookmark = None
                         
-                        for page in pdf.pages:
-                            writer.add_page(page)
+                        for doc in docs:
+                            if not doc.local_path or not doc.local_path.exists():
+                                continue
                             
-                        current_page += len(pdf.pages)
-                        
-                    if pdf_path != str(doc.local_path):
-                        os.unlink(pdf_path)
-                        
-                except Exception as e:
-                    logger.error(f"Error agregando {doc.title} a sección {section_name}: {e}")
-                    continue
-            
-            # Guardar PDF de sección
-            with open(section_output, 'wb') as f:
-                writer.write(f)
+                            try:
+                                pdf_path = self._ocr_paths.get(doc.local_path, doc.local_path)
+                                
+                                pdf = pikepdf.open(pdf_path)
+                                sources.append(pdf)
+                                
+                                start_page = len(writer.pages)
+                                writer.pages.extend(pdf.pages)
+                                
+                                # Agregar marcadores de sección y documento
+                                if section_bookmark is None:
+                                    section_bookmark = OutlineItem(section_name, 0)
+                                    outline.root.append(section_bookmark)
+                                title = doc.title.replace(f"{section_name}-", "").strip()
+                                section_bookmark.children.append(OutlineItem(title, start_page))
+                                
+                            except Exception as e:
+                                logger.error(f"Error agregando {doc.title} a sección {section_name}: {e}")
+                                continue
+
+                    if not len(writer.pages):
+                        logger.warning(f"Sección {section_name} sin páginas, se omite")
+                        continue
+                    
+                    # Guardar PDF de sección
+                    writer.save(section_output, **PDF_SAVE_OPTIONS)
+            finally:
+                for pdf in sources:
+                    pdf.close()
                 
             output_files.append(str(section_output))
             file_size_mb = os.path.getsize(section_output) / (1024 * 1024)
@@ -559,8 +878,7 @@ def save_metadata(documents: List[AIpDocument], output_folder: Path):
         metadata['documents'].append(doc_info)
     
     metadata_path = output_folder / 'metadata.json'
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    metadata_path.write_bytes(orjson.dumps(metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     logger.info(f"Metadatos guardados: {metadata_path}")
 
@@ -580,7 +898,7 @@ async def main():
             return
         
         # Descargar documentos
-        successful_downloads = scraper.download_all_documents()
+        successful_downloads = await scraper.download_all_documents()
         
         if successful_downloads == 0:
             logger.error("No se pudieron descargar documentos")
@@ -610,6 +928,8 @@ async def main():
             logger.info("Creando PDFs por sección como alternativa...")
             sectioned_pdfs = combiner.create_sectioned_pdfs()
             logger.info(f"PDFs por sección creados: {sectioned_pdfs}")
+        finally:
+            combiner.cleanup_ocr_files()
         
         # Guardar metadatos
         save_metadata(downloaded_docs, OUTPUT_FOLDER)
@@ -626,9 +946,11 @@ if __name__ == "__main__":
     # Verificar dependencias
     required_packages = [
         ('playwright', 'playwright'),
-        ('PyPDF2', 'PyPDF2'), 
+        ('pikepdf', 'pikepdf'),
         ('reportlab', 'reportlab'), 
-        ('requests', 'requests'), 
+        ('aiohttp', 'aiohttp'),
+        ('aiofiles', 'aiofiles'),
+        ('orjson', 'orjson'),
         ('fitz', 'PyMuPDF')  # PyMuPDF se importa como fitz
     ]
     
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Genera un paquete de dependencias para instalar sin conexión
+Descarga los wheels de requirements.txt en wheels/ y los empaqueta en deps.pyz
+"""
+
+import hashlib
+import shutil
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import zipapp
+from pathlib import Path
+
+WHEELS_DIR = Path('wheels')
+# Hash de requirements.txt, intérprete y plataforma con los que se generaron los wheels
+WHEELS_HASH_FILE = WHEELS_DIR / '.hash'
+BUNDLE_FILE = Path('deps.pyz')
+PIP_CACHE_DIR = '.pip-cache'
+
+# Punto de entrada del paquete: extrae los wheels e instala sin acceder a la red
+BUNDLE_MAIN = '''\
+import subprocess
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+with tempfile.TemporaryDirectory() as tmp:
+    with zipfile.ZipFile(sys.argv[0]) as bundle:
+        bundle.extractall(tmp)
+    sys.exit(subprocess.call([
+        sys.executable, '-m', 'pip', 'install', '--no-index',
+        '--find-links', str(Path(tmp) / 'wheels'),
+        '-r', str(Path(tmp) / 'requirements.txt'),
+    ]))
+'''
+
+def requirements_hash():
+    """Calcula el hash de requirements.txt"""
+    return hashlib.sha256(Path('requirements.txt').read_bytes()).hexdigest()
+
+def wheels_key(req_hash):
+    """Clave de wheels/: los wheels compilados solo sirven para el mismo intérprete y plataforma"""
+    return f"{req_hash} {sys.implementation.cache_tag} {sysconfig.get_platform()}"
+
+def wheels_up_to_date(req_hash):
+    """Indica si wheels/ se generó a partir del requirements.txt actual con este intérprete y plataforma"""
+    return WHEELS_HASH_FILE.exists() and WHEELS_HASH_FILE.read_text().strip() == wheels_key(req_hash)
+
+def build_wheels(req_hash):
+    """Descarga o compila los wheels de todas las dependencias en wheels/"""
+    if wheels_up_to_date(req_hash):
+        print(f"✓ requirements.txt sin cambios, se reutiliza {WHEELS_DIR}/")
+        return True
+
+    # Empezar de cero para no arrastrar versiones de un requirements.txt anterior
+    shutil.rmtree(WHEELS_DIR, ignore_errors=True)
+    command = [sys.executable, '-m', 'pip', 'wheel', '--cache-dir', PIP_CACHE_DIR,
+               '--prefer-binary', '-r', 'requirements.txt', '-w', str(WHEELS_DIR)]
+    print(f"Ejecutando: {' '.join(command)}")
+    try:
+        subprocess.run(command, check=True)
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"Error generando wheels: {e}")
+        return False
+
+    WHEELS_HASH_FILE.write_text(wheels_key(req_hash))
+    # El paquete anterior ya no corresponde a estos wheels
+    if BUNDLE_FILE.exists():
+        BUNDLE_FILE.unlink()
+    return True
+
+def build_bundle():
+    """Empaqueta wheels/ y requirements.txt en un zipapp ejecutable"""
+    if BUNDLE_FILE.exists():
+        print(f"✓ {BUNDLE_FILE} ya está actualizado")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        staging = Path(tmp)
+        shutil.copytree(WHEELS_DIR, staging / 'wheels', ignore=shutil.ignore_patterns('.hash'))
+        shutil.copy2('requirements.txt', staging / 'requirements.txt')
+        (staging / '__main__.py').write_text(BUNDLE_MAIN)
+        zipapp.create_archive(staging, BUNDLE_FILE, interpreter='/usr/bin/env python3')
+
+    size_mb = BUNDLE_FILE.stat().st_size / (1024 * 1024)
+    print(f"✓ Paquete creado: {BUNDLE_FILE} ({size_mb:.1f} MB)")
+
+def main():
+    """Genera wheels/ y deps.pyz si requirements.txt cambió"""
+    print("=== AIP Argentina Scraper - Paquete de dependencias ===\n")
+
+    if not build_wheels(requirements_hash()):
+        sys.exit(1)
+    build_bundle()
+
+    print("\nPara instalar sin conexión en otra máquina:")
+    print(f"  python {BUNDLE_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ Mantiene tasas/derechos y tablas de sol según pedido del usuario
 
 import sys
 from pathlib import Path
-from PyPDF2 import PdfReader, PdfWriter
+import pikepdf
 import os
 
 def create_optimized_gen():
@@ -26,44 +26,53 @@ def create_optimized_gen():
     output_folder = Path("aip_output")
     output_folder.mkdir(exist_ok=True)
     
-    writer = PdfWriter()
     total_size = 0
     included_files = []
     excluded_files = []
     
     # Obtener todos los archivos GEN y ordenar
     gen_files = sorted([f for f in download_folder.glob("GEN_*.pdf")])
+    output_path = output_folder / "AIP_Argentina_GEN_Optimizado_v2.pdf"
     
-    for pdf_file in gen_files:
-        # Verificar si debe excluirse
-        should_exclude = any(pattern in pdf_file.name for pattern in exclude_patterns)
-        
-        if should_exclude:
-            excluded_files.append(pdf_file.name)
-            print(f"❌ Excluido: {pdf_file.name}")
-            continue
-            
-        try:
-            with open(pdf_file, 'rb') as f:
-                reader = PdfReader(f)
+    # Los PDFs de origen deben seguir abiertos hasta guardar (qpdf copia los streams al escribir)
+    sources = []
+    
+    try:
+        with pikepdf.Pdf.new() as writer:
+            for pdf_file in gen_files:
+                # Verificar si debe excluirse
+                should_exclude = any(pattern in pdf_file.name for pattern in exclude_patterns)
                 
-                # Agregar todas las páginas
-                for page in reader.pages:
-                    writer.add_page(page)
+                if should_exclude:
+                    excluded_files.append(pdf_file.name)
+                    print(f"❌ Excluido: {pdf_file.name}")
+                    continue
                     
-                file_size = os.path.getsize(pdf_file)
-                total_size += file_size
-                included_files.append(pdf_file.name)
-                print(f"✅ Incluido: {pdf_file.name} ({file_size/1024:.0f}KB)")
-                
-        except Exception as e:
-            print(f"⚠️  Error con {pdf_file.name}: {e}")
-            continue
-    
-    # Guardar PDF optimizado
-    output_path = output_folder / "AIP_Argentina_GEN_Optimizado_v2.pdf"
-    with open(output_path, 'wb') as f:
-        writer.write(f)
+                try:
+                    reader = pikepdf.open(pdf_file)
+                    sources.append(reader)
+                    
+                    # Agregar todas las páginas sin expandirlas en Python
+                    writer.pages.extend(reader.pages)
+                        
+                    file_size = os.path.getsize(pdf_file)
+                    total_size += file_size
+                    included_files.append(pdf_file.name)
+                    print(f"✅ Incluido: {pdf_file.name} ({file_size/1024:.0f}KB)")
+                    
+                except Exception as e:
+                    print(f"⚠️  Error con {pdf_file.name}: {e}")
+                    continue
+            
+            # Guardar PDF optimizado
+            writer.save(
+                output_path,
+                compress_streams=True,
+                object_stream_mode=pikepdf.ObjectStreamMode.generate
+            )
+    finally:
+        for reader in sources:
+            reader.close()
     
     final_size = os.path.getsize(output_path)
     
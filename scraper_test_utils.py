@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Utilidades compartidas por los scripts de prueba del scraper
+Mantiene un único driver y browser de Playwright reutilizados entre pruebas
+"""
+
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from aip_scraper import block_unneeded_resources
+
+PROFILE_DIR = "./.pw_profile"
+
+# Driver de Playwright y contexto persistente compartidos por todas las pruebas
+_pw = None
+_context = None
+
+async def get_playwright():
+    """Devuelve el driver de Playwright compartido, iniciándolo la primera vez"""
+    global _pw
+    if _pw is None:
+        _pw = await async_playwright().start()
+    return _pw
+
+async def stop_playwright():
+    """Detiene el driver de Playwright compartido si está en ejecución"""
+    global _pw
+    if _pw is not None:
+        playwright, _pw = _pw, None
+        await playwright.stop()
+
+async def _get_context():
+    """Devuelve el contexto del browser compartido, lanzándolo la primera vez"""
+    global _context
+    if _context is None:
+        playwright = await get_playwright()
+        try:
+            context = await playwright.chromium.launch_persistent_context(
+                user_data_dir=PROFILE_DIR,
+                headless=True
+            )
+            # Las pruebas solo leen enlaces y tablas: no hacen falta imágenes, fuentes ni estilos
+            await context.route("**/*", block_unneeded_resources)
+        except Exception:
+            await stop_playwright()
+            raise
+        _context = context
+
+    return _context
+
+@asynccontextmanager
+async def browser_session():
+    """Entrega una página nueva del browser compartido y la cierra al terminar"""
+    context = await _get_context()
+    page = await context.new_page()
+    try:
+        yield page
+    finally:
+        await page.close()
+
+async def run_with_page(test_func):
+    """Ejecuta una prueba que recibe una página, informando errores al iniciar el browser"""
+    try:
+        async with browser_session() as page:
+            return await test_func(page)
+    except Exception as e:
+        print(f"❌ Error iniciando el browser: {e}")
+        return False
+
+async def close_browser():
+    """Cierra el browser compartido y detiene el driver de Playwright"""
+    global _context
+    try:
+        if _context is not None:
+            context, _context = _context, None
+            await context.close()
+    finally:
+        await stop_playwright()
@@ -6,20 +6,30 @@ Script de configuración inicial para AIP Argentina Scraper
 import subprocess
 import sys
 import os
+import re
+import shutil
+import hashlib
+from importlib import metadata
 from pathlib import Path
 
+from build_bundle import WHEELS_DIR, requirements_hash, wheels_up_to_date
+
+# Caché de pip (wheels y descargas HTTP) reutilizable entre ejecuciones
+PIP_CACHE_DIR = '.pip-cache'
+# Hash de requirements.txt e intérprete de la última instalación exitosa
+REQUIREMENTS_MARKER = Path(PIP_CACHE_DIR) / '.req.sha256'
+# Nombre del paquete al inicio de cada línea de requirements.txt
+_REQUIREMENT_NAME_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*')
+
 def run_command(command):
-    """Ejecuta un comando y muestra el resultado"""
-    print(f"Ejecutando: {command}")
+    """Ejecuta un comando (lista de argumentos) mostrando su salida en vivo"""
+    print(f"Ejecutando: {' '.join(command)}")
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        if result.stdout:
-            print(result.stdout)
+        # Sin shell intermedio; stdout/stderr se heredan y se ven en tiempo real
+        subprocess.run(command, check=True)
         return True
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, OSError) as e:
         print(f"Error ejecutando comando: {e}")
-        if e.stderr:
-            print(f"Error: {e.stderr}")
         return False
 
 def check_python_version():
@@ -32,31 +42,70 @@ def check_python_version():
     print(f"✓ Python {version.major}.{version.minor}.{version.micro} OK")
     return True
 
-def install_requirements():
-    """Instala las dependencias de Python"""
-    print("\n=== Instalando dependencias de Python ===")
-    return run_command(f"{sys.executable} -m pip install -r requirements.txt")
+def install_key(req_hash):
+    """Clave de instalación: requirements.txt más el intérprete y entorno que lo instalan"""
+    return hashlib.sha256(f"{req_hash}\n{sys.executable}\n{sys.prefix}".encode()).hexdigest()
 
-def setup_playwright():
-    """Configura Playwright y descarga browsers"""
-    print("\n=== Configurando Playwright ===")
-    if not run_command(f"{sys.executable} -m playwright install chromium"):
-        print("Error instalando browsers de Playwright")
+def missing_requirements():
+    """Devuelve los paquetes de requirements.txt que no están instalados en este entorno"""
+    missing = []
+    for line in Path('requirements.txt').read_text().splitlines():
+        match = _REQUIREMENT_NAME_RE.match(line.strip())
+        if not match:
+            continue
+        try:
+            metadata.version(match.group(0))
+        except metadata.PackageNotFoundError:
+            missing.append(match.group(0))
+    return missing
+
+def requirements_up_to_date(key):
+    """Indica si requirements.txt no cambió desde la última instalación en este entorno y todo sigue instalado"""
+    if not REQUIREMENTS_MARKER.exists() or REQUIREMENTS_MARKER.read_text().strip() != key:
+        return False
+    # pip check no detecta paquetes ausentes, solo dependencias rotas
+    if missing_requirements():
         return False
+    result = subprocess.run([sys.executable, '-m', 'pip', 'check'], capture_output=True, text=True)
+    return result.returncode == 0
+
+def install_dependencies():
+    """Instala las dependencias de Python y el browser de Playwright"""
+    print("\n=== Instalando dependencias de Python y Playwright ===")
+    req_hash = requirements_hash()
+    key = install_key(req_hash)
+    commands = []
+    
+    if requirements_up_to_date(key):
+        print("✓ requirements.txt sin cambios, se omite la instalación con pip")
+    elif wheels_up_to_date(req_hash):
+        # Wheels generados por build_bundle.py: instalación local sin acceso a la red
+        print(f"✓ Instalando desde los wheels locales de {WHEELS_DIR}/")
+        commands.append([sys.executable, '-m', 'pip', 'install', '--no-index',
+                         '--find-links', str(WHEELS_DIR), '-r', 'requirements.txt'])
+    else:
+        commands.append([sys.executable, '-m', 'pip', 'install', '--cache-dir', PIP_CACHE_DIR,
+                         '--prefer-binary', '-r', 'requirements.txt'])
+    commands.append([sys.executable, '-m', 'playwright', 'install', 'chromium'])
+    
+    # all() corta la ejecución ante el primer error
+    if not all(run_command(command) for command in commands):
+        return False
+    
+    REQUIREMENTS_MARKER.parent.mkdir(exist_ok=True)
+    REQUIREMENTS_MARKER.write_text(key)
     return True
 
 def check_tesseract():
     """Verifica si Tesseract está instalado (opcional para OCR)"""
     print("\n=== Verificando Tesseract (OCR) ===")
-    try:
-        result = subprocess.run(['tesseract', '--version'], capture_output=True, text=True)
-        if result.returncode == 0:
-            print("✓ Tesseract encontrado")
-            print("Para mejor OCR en español, instala el paquete de idioma:")
-            print("  macOS: brew install tesseract-lang")
-            return True
-    except FileNotFoundError:
-        pass
+    # Basta con buscarlo en el PATH; no hace falta lanzar el binario
+    tesseract_path = shutil.which('tesseract')
+    if tesseract_path:
+        print(f"✓ Tesseract encontrado en {tesseract_path}")
+        print("Para mejor OCR en español, instala el paquete de idioma:")
+        print("  macOS: brew install tesseract-lang")
+        return True
     
     print("⚠ Tesseract no encontrado (opcional)")
     print("Para habilitar OCR completo, instala Tesseract:")
@@ -68,10 +117,16 @@ def check_tesseract():
 def create_directories():
     """Crea directorios necesarios"""
     print("\n=== Creando directorios ===")
-    dirs = ['aip_downloads', 'aip_output', 'temp_aip']
+    dirs = ['aip_downloads', 'aip_output', 'temp_aip', PIP_CACHE_DIR]
+    # Un solo listado del directorio actual en lugar de un mkdir por carpeta
+    with os.scandir('.') as entries:
+        existing = {entry.name for entry in entries if entry.is_dir()}
     for dir_name in dirs:
-        Path(dir_name).mkdir(exist_ok=True)
-        print(f"✓ Directorio creado: {dir_name}")
+        if dir_name in existing:
+            print(f"✓ Directorio existente: {dir_name}")
+        else:
+            os.mkdir(dir_name)
+            print(f"✓ Directorio creado: {dir_name}")
 
 def main():
     """Configuración principal"""
@@ -81,14 +136,9 @@ def main():
     if not check_python_version():
         sys.exit(1)
     
-    # Instalar dependencias
-    if not install_requirements():
-        print("Error instalando dependencias")
-        sys.exit(1)
-    
-    # Configurar Playwright
-    if not setup_playwright():
-        print("Error configurando Playwright")
+    # Instalar dependencias y configurar Playwright
+    if not install_dependencies():
+        print("Error instalando dependencias o configurando Playwright")
         sys.exit(1)
     
     # Verificar Tesseract (opcional)
@@ -9,60 +9,52 @@ from pathlib import Path
 
 # Importar solo lo necesario
 from aip_scraper import AIPScraper
+from scraper_test_utils import run_with_page, close_browser
 
-async def test_quick_scraping():
+async def test_quick_scraping(page):
     """Prueba rápida que extrae solo algunos documentos"""
     print("=== Prueba rápida de scraping (con límites) ===")
     
     try:
         scraper = AIPScraper()
         
-        from playwright.async_api import async_playwright
+        await page.goto("https://ais.anac.gob.ar/aip", wait_until='domcontentloaded')
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
-            try:
-                await page.goto("https://ais.anac.gob.ar/aip")
-                await page.wait_for_load_state('networkidle')
-                
-                print("✓ Sitio web cargado correctamente")
-                
-                # Probar solo sección GEN con límites estrictos
-                print("\nProbando extracción de sección GEN (limitada)...")
-                gen_docs = await scraper.scrape_section_documents(page, 'GEN')
-                
-                print(f"\n✅ Éxito: Encontrados {len(gen_docs)} documentos únicos en GEN")
-                
-                # Mostrar algunos ejemplos
-                print("\n📄 Primeros 10 documentos encontrados:")
-                for i, doc in enumerate(gen_docs[:10]):
-                    print(f"  {i+1:2d}. {doc.title}")
-                    print(f"      📅 {doc.version}")
-                
-                # Verificar filtrado de AD si hay tiempo
-                print("\n🔍 Probando filtrado de documentos AD...")
-                test_titles = [
-                    "AD-0.6 Indices - Indice",
-                    "AD-1.1 AD/HEL Introducción",
-                    "SADF-AD-2.0 Aeródromos - Datos del AD SAN FERNANDO",
-                    "SABE-AD-2.0 Aeródromos - Datos del AD BUENOS AIRES"
-                ]
-                
-                print("Resultados del filtrado:")
-                for title in test_titles:
-                    should_include = scraper._should_include_document(title, 'AD')
-                    status = "✅ Incluido" if should_include else "❌ Excluido"
-                    print(f"  {status}: {title}")
-                
-                print("\n🎉 ¡Prueba rápida completada exitosamente!")
-                print(f"📊 El scraper funciona correctamente y encontró {len(gen_docs)} documentos")
-                
-                return True
-                
-            finally:
-                await browser.close()
+        print("✓ Sitio web cargado correctamente")
+        
+        # Probar solo sección GEN con límites estrictos
+        print("\nProbando extracción de sección GEN (limitada)...")
+        await page.wait_for_selector('a[href="/aip#gen"]', timeout=10_000)
+        gen_docs = await scraper.scrape_section_documents(page, 'GEN')
+        
+        print(f"\n✅ Éxito: Encontrados {len(gen_docs)} documentos únicos en GEN")
+        
+        # Mostrar algunos ejemplos
+        print("\n📄 Primeros 10 documentos encontrados:")
+        sys.stdout.write("".join(
+            f"  {i+1:2d}. {doc.title}\n      📅 {doc.version}\n"
+            for i, doc in enumerate(gen_docs[:10])
+        ))
+        
+        # Verificar filtrado de AD si hay tiempo
+        print("\n🔍 Probando filtrado de documentos AD...")
+        test_titles = [
+            "AD-0.6 Indices - Indice",
+            "AD-1.1 AD/HEL Introducción",
+            "SADF-AD-2.0 Aeródromos - Datos del AD SAN FERNANDO",
+            "SABE-AD-2.0 Aeródromos - Datos del AD BUENOS AIRES"
+        ]
+        
+        print("Resultados del filtrado:")
+        results = list(map(scraper._should_include_document, test_titles, ['AD'] * len(test_titles)))
+        for title, should_include in zip(test_titles, results):
+            status = "✅ Incluido" if should_include else "❌ Excluido"
+            print(f"  {status}: {title}")
+        
+        print("\n🎉 ¡Prueba rápida completada exitosamente!")
+        print(f"📊 El scraper funciona correctamente y encontró {len(gen_docs)} documentos")
+        
+        return True
                 
     except Exception as e:
         print(f"❌ Error en prueba rápida: {e}")
@@ -74,7 +66,10 @@ async def main():
     """Función principal de prueba rápida"""
     print("AIP Argentina - Prueba Rápida\n")
     
-    success = await test_quick_scraping()
+    try:
+        success = await run_with_page(test_quick_scraping)
+    finally:
+        await close_browser()
     
     if success:
         print(f"\n{'='*60}")
@@ -4,11 +4,16 @@ Script de prueba para verificar funcionalidad básica del AIP scraper
 """
 
 import asyncio
+import contextvars
+import io
+import logging
+import os
 import sys
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from aip_scraper import AIPScraper, AIpDocument
+from scraper_test_utils import run_with_page, close_browser
 
-async def test_basic_scraping():
+async def test_basic_scraping(page):
     """Prueba básica de scraping sin descargar archivos"""
     print("=== Prueba básica de scraping ===")
     
@@ -18,50 +23,39 @@ async def test_basic_scraping():
         # Solo extraer documentos de una sección para prueba
         print("Extrayendo documentos de muestra...")
         
-        from playwright.async_api import async_playwright
+        await page.goto("https://ais.anac.gob.ar/aip", wait_until='domcontentloaded')
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
-            try:
-                await page.goto("https://ais.anac.gob.ar/aip")
-                await page.wait_for_load_state('networkidle')
-                
-                # Probar extracción de documentos GEN (sección más pequeña)
-                gen_docs = await scraper.scrape_section_documents(page, 'GEN')
-                
-                print(f"✓ Encontrados {len(gen_docs)} documentos en sección GEN")
-                
-                # Mostrar primeros 5 documentos
-                for i, doc in enumerate(gen_docs[:5]):
-                    print(f"  {i+1}. {doc.title}")
-                    print(f"     URL: {doc.url}")
-                    print(f"     Versión: {doc.version}")
-                    print()
-                
-                # Verificar filtrado de AD
-                print("\nProbando filtrado de documentos AD...")
-                
-                # Simular documentos AD
-                test_titles = [
-                    "AD-0.6 Indices - Indice",
-                    "AD-1.1 AD/HEL Introducción - Disponibilidad",
-                    "SAAC-AD-2.0 Aeródromos - Datos del AD CONCORDIA",
-                    "SADF-AD-2.0 Aeródromos - Datos del AD SAN FERNANDO",
-                    "SABE-AD-2.0 Aeródromos - Datos del AD BUENOS AIRES"
-                ]
-                
-                for title in test_titles:
-                    should_include = scraper._should_include_document(title, 'AD')
-                    status = "✓ Incluido" if should_include else "✗ Excluido"
-                    print(f"  {status}: {title}")
-                
-                print("\n✅ Prueba básica completada exitosamente")
-                return True
-                
-            finally:
-                await browser.close()
+        # Probar extracción de documentos GEN (sección más pequeña)
+        await page.wait_for_selector('a[href="/aip#gen"]', timeout=10_000)
+        gen_docs = await scraper.scrape_section_documents(page, 'GEN')
+        
+        print(f"✓ Encontrados {len(gen_docs)} documentos en sección GEN")
+        
+        # Mostrar primeros 5 documentos
+        sys.stdout.write("".join(
+            f"  {i+1}. {doc.title}\n     URL: {doc.url}\n     Versión: {doc.version}\n\n"
+            for i, doc in enumerate(gen_docs[:5])
+        ))
+        
+        # Verificar filtrado de AD
+        print("\nProbando filtrado de documentos AD...")
+        
+        # Simular documentos AD
+        test_titles = [
+            "AD-0.6 Indices - Indice",
+            "AD-1.1 AD/HEL Introducción - Disponibilidad",
+            "SAAC-AD-2.0 Aeródromos - Datos del AD CONCORDIA",
+            "SADF-AD-2.0 Aeródromos - Datos del AD SAN FERNANDO",
+            "SABE-AD-2.0 Aeródromos - Datos del AD BUENOS AIRES"
+        ]
+        
+        results = list(map(scraper._should_include_document, test_titles, ['AD'] * len(test_titles)))
+        for title, should_include in zip(test_titles, results):
+            status = "✓ Incluido" if should_include else "✗ Excluido"
+            print(f"  {status}: {title}")
+        
+        print("\n✅ Prueba básica completada exitosamente")
+        return True
                 
     except Exception as e:
         print(f"❌ Error en prueba básica: {e}")
@@ -91,51 +85,64 @@ def test_pdf_creation():
         OUTPUT_FOLDER.mkdir(exist_ok=True)
         index_path = combiner.create_index_pdf()
         
-        if Path(index_path).exists():
-            print(f"✓ Índice creado: {index_path}")
-            file_size = Path(index_path).stat().st_size / 1024
-            print(f"  Tamaño: {file_size:.1f} KB")
-            return True
-        else:
+        try:
+            file_stat = os.stat(index_path)
+        except FileNotFoundError:
             print("❌ Error: No se pudo crear el índice")
             return False
+        
+        print(f"✓ Índice creado: {index_path}")
+        print(f"  Tamaño: {file_stat.st_size / 1024:.1f} KB")
+        return True
             
     except Exception as e:
         print(f"❌ Error en prueba de PDF: {e}")
         return False
 
+def _try_import(module: str) -> bool:
+    """Intenta importar un módulo y devuelve si está disponible"""
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
 def test_dependencies():
     """Verifica que todas las dependencias estén disponibles"""
     print("\n=== Verificación de dependencias ===")
     
     dependencies = [
         ('playwright', 'Playwright'),
-        ('PyPDF2', 'PyPDF2'),
+        ('pikepdf', 'pikepdf'),
         ('reportlab', 'ReportLab'),
-        ('requests', 'Requests'),
+        ('aiohttp', 'aiohttp'),
+        ('aiofiles', 'aiofiles'),
+        ('orjson', 'orjson'),
         ('fitz', 'PyMuPDF'),
     ]
     
+    # Dependencias opcionales
+    optional_deps = [
+        ('ocrmypdf', 'OCRmyPDF (OCR)'),
+    ]
+    
+    # Importar todo en paralelo; map conserva el orden original para imprimir
+    modules = [module for module, _ in dependencies + optional_deps]
+    with ThreadPoolExecutor(max_workers=len(modules)) as executor:
+        available = dict(zip(modules, executor.map(_try_import, modules)))
+    
     missing = []
     for module, name in dependencies:
-        try:
-            __import__(module)
+        if available[module]:
             print(f"✓ {name}")
-        except ImportError:
+        else:
             print(f"❌ {name} - FALTANTE")
             missing.append(name)
     
-    # Dependencias opcionales
-    optional_deps = [
-        ('pytesseract', 'pytesseract (OCR)'),
-        ('PIL', 'Pillow (procesamiento de imágenes)')
-    ]
-    
     for module, name in optional_deps:
-        try:
-            __import__(module)
+        if available[module]:
             print(f"✓ {name}")
-        except ImportError:
+        else:
             print(f"⚠ {name} - OPCIONAL")
     
     if missing:
@@ -146,6 +153,41 @@ def test_dependencies():
         print("\n✅ Todas las dependencias principales disponibles")
         return True
 
+# Buffer de salida de la prueba en curso: cada prueba concurrente escribe en el suyo
+_test_output = contextvars.ContextVar('test_output', default=None)
+
+class _BufferedStdout:
+    """Envía print() al buffer de la prueba en curso, o a la salida real si no hay ninguno"""
+    def __init__(self, stream):
+        self._stream = stream
+    
+    def write(self, text):
+        return (_test_output.get() or self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+
+async def _run_buffered(test_func):
+    """Ejecuta una prueba capturando su salida; las síncronas corren en un hilo aparte"""
+    buffer = io.StringIO()
+    
+    if asyncio.iscoroutinefunction(test_func):
+        # gather ejecuta cada corrutina en su propia tarea, con su propia copia del contexto
+        _test_output.set(buffer)
+        result = await run_with_page(test_func)
+    else:
+        def run_in_thread():
+            token = _test_output.set(buffer)
+            try:
+                return test_func()
+            finally:
+                _test_output.reset(token)
+        
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, run_in_thread)
+    
+    return result, buffer.getvalue()
+
 async def main():
     """Función principal de pruebas"""
     print("AIP Argentina Scraper - Pruebas\n")
@@ -156,17 +198,41 @@ async def main():
         ("Scraping básico", test_basic_scraping)
     ]
     
+    # Ejecutar las pruebas en paralelo, guardando la salida de cada una por separado
+    real_stdout = sys.stdout
+    buffered_stdout = _BufferedStdout(real_stdout)
+    sys.stdout = buffered_stdout
+    # El StreamHandler de logging del scraper guarda el stdout real desde la importación
+    log_handlers = [
+        handler for handler in logging.getLogger().handlers
+        if isinstance(handler, logging.StreamHandler) and handler.stream is real_stdout
+    ]
+    for handler in log_handlers:
+        handler.setStream(buffered_stdout)
+    try:
+        outcomes = await asyncio.gather(
+            *(_run_buffered(test_func) for _, test_func in tests),
+            return_exceptions=True
+        )
+    finally:
+        sys.stdout = real_stdout
+        for handler in log_handlers:
+            handler.setStream(real_stdout)
+        await close_browser()
+    
     results = []
     
-    for test_name, test_func in tests:
+    for (test_name, _), outcome in zip(tests, outcomes):
         print(f"\n{'='*50}")
         print(f"Ejecutando: {test_name}")
         print('='*50)
         
-        if asyncio.iscoroutinefunction(test_func):
-            result = await test_func()
+        if isinstance(outcome, BaseException):
+            print(f"❌ Error inesperado: {outcome}")
+            result = False
         else:
-            result = test_func()
+            result, output = outcome
+            sys.stdout.write(output)
             
         results.append((test_name, result))
     